@@ -2,19 +2,20 @@
 import os
 from pathlib import Path
 from decimal import Decimal
-from datetime import datetime
 
 from flask import Flask, render_template, request, redirect, url_for, jsonify, flash
 from flask_login import LoginManager, login_required, current_user
 from flask_migrate import Migrate
+from markupsafe import Markup
+from sqlalchemy import bindparam, event, func, insert, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
 
 from config import Config
-from models import db, Item, Category, User
-from auth import auth_bp
-from items import items_bp
-from categories import categories_bp
-from utils import save_upload  # <- for photo saving
+from models import db, User, Item, Category
+from cache import cache
 
 
 def _normalize_database_url(url: str | None) -> str | None:
@@ -28,6 +29,44 @@ def _normalize_database_url(url: str | None) -> str | None:
         return "postgresql+psycopg2://" + url.removeprefix("postgres://")
     return url
 
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_TEMPLATE_DIR = os.path.join(_BASE_DIR, "templates")
+_STATIC_DIR = os.path.join(_BASE_DIR, "static")
+
+DASHBOARD_PER_PAGE = 50
+DASHBOARD_MAX_PER_PAGE = 200
+DASHBOARD_CACHE_TIMEOUT = 600  # seconds; keys are versioned, so this only bounds memory
+
+# Built once; items_new binds per-request values onto it
+_ITEM_INSERT = insert(Item).returning(Item.id)
+
+# Scanner hot path: same statement object every request, so SQLAlchemy's
+# compiled cache hit is guaranteed and only the bound values change.
+_ITEM_ID_BY_BARCODE = select(Item.id).where(
+    Item.user_id == bindparam("uid"),
+    Item.barcode == bindparam("barcode"),
+)
+
+def _estimated_profit(*criteria) -> Decimal:
+    """
+    Sum of Item.profit over every item matching criteria (ignores pagination),
+    aggregated in the database instead of loading rows.
+
+    Same formula as Item.profit (price - 20% fee - purchase); items without a
+    sold/list price have no profit and are skipped. Item has no status column,
+    so nothing is excluded as "sold".
+    """
+    profit = Item.sold_price - Item.sold_price * Decimal("0.20") - Item.purchase_price
+    total = db.session.execute(
+        select(func.sum(profit)).where(
+            *criteria, Item.sold_price.isnot(None), Item.purchase_price.isnot(None)
+        )
+    ).scalar()
+    if total is None:
+        return Decimal("0.00")
+    # coerce to Decimal just in case (e.g. SQLite float results)
+    return total if isinstance(total, Decimal) else Decimal(str(total))
+
 def generate_next_barcode(user_id: int) -> str:
     """
     Find the largest numeric barcode for this user and return the next one
@@ -59,14 +98,50 @@ def generate_next_barcode(user_id: int) -> str:
     next_num = max_num + 1
     return str(next_num)
 
+def _cacheable_json(payload, max_age: int = 5):
+    """
+    JSON response the browser may reuse briefly (repeat scans of the same code)
+    and revalidate with If-None-Match -> 304. Private: it's per-user data.
+    """
+    resp = jsonify(payload)
+    resp.cache_control.private = True
+    resp.cache_control.max_age = max_age
+    resp.add_etag()
+    return resp.make_conditional(request)
+
+def _set_sqlite_pragmas(dbapi_conn, conn_record):
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA cache_size=-20000")  # ~20MB page cache
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
+class _HealthzMiddleware:
+    """
+    Answer /healthz with a canned JSON body without entering Flask
+    (no request context, hooks, session or login handling per probe).
+    """
+    BODY = b'{"ok":true}'
+    HEADERS = [("Content-Type", "application/json"), ("Content-Length", str(len(BODY)))]
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") == "/healthz":
+            start_response("200 OK", list(self.HEADERS))
+            return [self.BODY]
+        return self.wsgi_app(environ, start_response)
+
 def create_app():
     # Load .env for local dev (no-op in prod)
     load_dotenv()
 
     app = Flask(
         __name__,
-        template_folder=os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates"),
-        static_folder=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"),
+        template_folder=_TEMPLATE_DIR,
+        static_folder=_STATIC_DIR,
     )
 
     # ---------- Base config ----------
@@ -88,6 +163,19 @@ def create_app():
 
     app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
 
+    # Template caches: bytecode on disk (reused across workers and restarts) and
+    # an in-memory LRU larger than our template count so nothing gets evicted.
+    # Passed as jinja_options because Jinja only reads cache_size when Flask
+    # builds app.jinja_env. Auto-reload already follows DEBUG / TEMPLATES_AUTO_RELOAD,
+    # so production workers never stat() templates.
+    jinja_cache_dir = os.path.join(app.instance_path, "jinja_cache")
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+    app.jinja_options = {
+        **app.jinja_options,
+        "bytecode_cache": FileSystemBytecodeCache(jinja_cache_dir, "%s.cache"),
+        "cache_size": 1000,
+    }
+
     # Uploads folder
     app.config["UPLOAD_FOLDER"] = os.path.join(app.static_folder, "uploads")
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
@@ -95,6 +183,28 @@ def create_app():
     # ---------- DB / Migrations ----------
     db.init_app(app)
     Migrate(app, db)  # requires Flask-Migrate installed
+    cache.init_app(app)
+
+    # Local SQLite: WAL so readers don't block on the writer, cheaper commits
+    if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        with app.app_context():
+            event.listen(db.engine, "connect", _set_sqlite_pragmas)
+
+    # ---------- CLI ----------
+    @app.cli.command("init-db")
+    def init_db():
+        """Create missing tables (local dev). Production uses `flask db upgrade`."""
+        db.create_all()
+
+    # ---------- Blueprint modules ----------
+    # Imported here (not at module top) so `import app` / `flask db ...` don't
+    # pull in every view module and Pillow until an app is actually built.
+    from auth import auth_bp
+    from items import items_bp
+    from categories import categories_bp, user_categories
+    from utils import (  # photos, barcodes, form values
+        save_upload, discard_upload, normalize_barcode, parse_money, parse_date,
+    )
 
     # ---------- Auth ----------
     login_manager = LoginManager(app)
@@ -102,7 +212,7 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(user_id):
-        # SQLAlchemy 2.x-safe get
+        # SQLAlchemy 2.x-safe get; Flask-Login keeps the result for the request
         return db.session.get(User, int(user_id))
 
     # ---------- Blueprints ----------
@@ -110,7 +220,7 @@ def create_app():
     app.register_blueprint(items_bp)
     app.register_blueprint(categories_bp)
 
-    # Defer labels import to avoid circulars, then register
+    # Deferred like the others (also avoids circulars), then register
     from labels import labels_bp
     app.register_blueprint(labels_bp)
 
@@ -149,43 +259,59 @@ def create_app():
         cat_id = request.args.get("category", type=int)
 
         # current_user is guaranteed to be a real user here
-        q = Item.query.filter_by(user_id=current_user.id)
+        criteria = [Item.user_id == current_user.id]
         if cat_id:
-            q = q.filter(Item.category_id == cat_id)
-
-        items = q.order_by(Item.created_at.desc()).all()
-
-        total_estimated_profit = Decimal("0.00")
-        for item in items:
-            profit = getattr(item, "profit", None)
-            if profit is None:
-                continue
-
-            # coerce to Decimal just in case
-            if not isinstance(profit, Decimal):
-                try:
-                    profit = Decimal(str(profit))
-                except Exception:
-                    continue
-
-            status = (getattr(item, "status", "") or "").lower()
-            is_sold = (status == "sold")
-
-            if not is_sold:
-                total_estimated_profit += profit
+            criteria.append(Item.category_id == cat_id)
+
+        page = request.args.get("page", 1, type=int)
+        per_page = request.args.get("per_page", DASHBOARD_PER_PAGE, type=int)
+        per_page = min(max(per_page, 1), DASHBOARD_MAX_PER_PAGE)
+
+        # Cheap version probe: any insert/edit/delete changes count or max(updated_at),
+        # so the cached table + totals can be reused until the data actually changes.
+        count, last_change = db.session.execute(
+            select(func.count(Item.id), func.max(Item.updated_at)).where(*criteria)
+        ).one()
+        cache_key = f"dashboard:{current_user.id}:{cat_id or 0}:{page}:{per_page}:{count}:{last_change}"
+
+        cached = cache.get(cache_key)
+        if cached is None:
+            # Only the columns the grid renders (skips notes etc.); category names
+            # are shown per row, so batch-load them in one IN query
+            stmt = (
+                select(Item)
+                .where(*criteria)
+                .options(
+                    load_only(
+                        Item.id, Item.title, Item.brand, Item.size, Item.barcode, Item.category_id,
+                        Item.purchase_price, Item.sold_price, Item.photo_path,
+                    ),
+                    selectinload(Item.category).load_only(Category.id, Category.name),
+                )
+                .order_by(Item.created_at.desc())
+            )
+            pagination = db.paginate(
+                stmt, page=page, per_page=per_page, max_per_page=DASHBOARD_MAX_PER_PAGE, error_out=False
+            )
+            items_html = render_template(
+                "_dashboard_items.html",
+                items=pagination.items,
+                pagination=pagination,
+                selected_cat=cat_id,
+                per_page=(per_page if per_page != DASHBOARD_PER_PAGE else None),
+            )
+            total_estimated_profit = _estimated_profit(*criteria)
+            cache.set(cache_key, (items_html, total_estimated_profit), timeout=DASHBOARD_CACHE_TIMEOUT)
+        else:
+            items_html, total_estimated_profit = cached
 
-        cats = (
-            Category.query.filter_by(user_id=current_user.id)
-            .order_by(Category.name.asc())
-            .all()
-        )
+        cats = user_categories(current_user.id)
 
         return render_template(
             "dashboard.html",
-            items=items,
+            items_html=Markup(items_html),
             categories=cats,
             selected_cat=cat_id,
-            Decimal=Decimal,
             total_estimated_profit=total_estimated_profit,
         )
 
@@ -196,12 +322,13 @@ def create_app():
         Reuse add_edit_item.html in read-only mode as your detail page.
         Ensure that template handles read_only=True (e.g., disable inputs).
         """
-        item = Item.query.filter_by(id=item_id, user_id=current_user.id).first_or_404()
-        cats = (
-            Category.query.filter_by(user_id=current_user.id)
-            .order_by(Category.name.asc())
-            .all()
+        # Detail view shows the category name; fetch it in the same query
+        item = db.first_or_404(
+            select(Item)
+            .options(joinedload(Item.category))
+            .where(Item.id == item_id, Item.user_id == current_user.id)
         )
+        cats = user_categories(current_user.id)
         return render_template(
             "add_edit_item.html",
             item=item,
@@ -214,29 +341,22 @@ def create_app():
     @app.route("/scan")
     @login_required
     def scan():
-        cats = (
-            Category.query.filter_by(user_id=current_user.id)
-            .order_by(Category.name.asc())
-            .all()
-        )
+        cats = user_categories(current_user.id)
         return render_template("scan.html", categories=cats)
 
     # Lookup API (used by scan.html to decide redirect)
     @app.get("/api/items/lookup")
     @login_required
     def api_items_lookup():
-        def normalize_barcode(raw: str) -> str:
-            if not raw:
-                return ""
-            return "".join(ch for ch in raw.strip() if ch.isalnum())
-
         barcode = normalize_barcode(request.args.get("barcode", ""))
         if not barcode:
-            return jsonify({"found": False}), 200
-        item = Item.query.filter_by(user_id=current_user.id, barcode=barcode).first()
-        if item:
-            return jsonify({"found": True, "id": item.id}), 200
-        return jsonify({"found": False}), 200
+            return _cacheable_json({"found": False})
+        item_id = db.session.execute(
+            _ITEM_ID_BY_BARCODE, {"uid": current_user.id, "barcode": barcode}
+        ).scalar()
+        if item_id is not None:
+            return _cacheable_json({"found": True, "id": item_id})
+        return _cacheable_json({"found": False})
 
     # === Manual Add / New Item ===
 
@@ -251,32 +371,10 @@ def create_app():
     @login_required
     def items_new(category_id: int | None = None):
         # Prefill from querystring (e.g., scanner adds ?barcode=...)
-        def normalize_barcode(raw: str) -> str:
-            if not raw:
-                return ""
-            return "".join(ch for ch in raw.strip() if ch.isalnum())
-
-        def parse_money(v):
-            try:
-                return Decimal(v)
-            except Exception:
-                return None
-
-        def parse_date(v):
-            try:
-                return datetime.strptime(v, "%Y-%m-%d").date() if v else None
-            except Exception:
-                return None
-
         prefill = {"barcode": request.args.get("barcode", "")}
 
         # Categories for dropdown
-        categories = (
-            Category.query
-            .filter_by(user_id=current_user.id)
-            .order_by(Category.name.asc())
-            .all()
-        )
+        categories = user_categories(current_user.id)
 
         # Selected category from URL or form
         cat_id = (
@@ -315,70 +413,77 @@ def create_app():
             photo_path = None
             if "photo" in request.files and request.files["photo"].filename:
                 photo_path = save_upload(request.files["photo"])  # returns e.g. "uploads/uuid.jpg"
-
-            # If barcode provided and already exists for this user, go to existing item
-            if raw_barcode:
-                existing = Item.query.filter_by(user_id=current_user.id, barcode=raw_barcode).first()
-                if existing:
-                    flash("Item with this barcode already exists; opening it.", "info")
-                    return redirect(url_for("item_detail", item_id=existing.id))
+                if not photo_path:
+                    flash("Photo not saved (file type not allowed).", "error")
 
             #Auto-generate barcode if none was provided
+            barcode_given = bool(raw_barcode)
             if not raw_barcode:
                 raw_barcode = generate_next_barcode(current_user.id)
 
-            # Create the item
-            item = Item(
-                user_id=current_user.id,
-                category_id=category.id,
-                barcode=raw_barcode or None,
-                title=title if hasattr(Item, "title") else None,
-                size=size,
-                color=color,
-                condition=condition,
-                notes=notes,
-                purchase_source=purchase_src,
-                purchase_price=purchase_price or Decimal("0.00"),
-                list_price=list_price,
-                sold_price=sold_price,
-                purchase_date=purchase_date,
-                sold_date=sold_date,
-                photo_path=photo_path
-            )
-
-            # Some schemas use 'name' instead of 'title'
-            if not hasattr(Item, "title") and hasattr(Item, "name"):
-                item.name = title
-
-            # If you also want to use the save_upload result above (kept for clarity)
-            if "photo" in request.files and request.files["photo"].filename and not photo_path:
-                rel_path = save_upload(request.files["photo"])
-                if rel_path:
-                    item.photo_path = rel_path
-                else:
-                    flash("Photo not saved (file type not allowed).", "error")
-
-            db.session.add(item)
+            # Create the item with a plain INSERT (no ORM instance / unit-of-work needed).
+            # list_price is a synonym for the sold_price column.
+            params = {
+                "user_id": current_user.id,
+                "category_id": category.id,
+                "barcode": raw_barcode or None,
+                "title": title,
+                "size": size,
+                "color": color,
+                "condition": condition,
+                "notes": notes,
+                "purchase_source": purchase_src,
+                "purchase_price": purchase_price or Decimal("0.00"),
+                "sold_price": sold_price if sold_price is not None else list_price,
+                "purchase_date": purchase_date,
+                "sold_date": sold_date,
+                "photo_path": photo_path,
+            }
+
+            # No pre-insert duplicate probe: uq_user_barcode rejects duplicates, and
+            # only that (rare) path pays for the extra lookup.
             try:
+                new_id = db.session.execute(_ITEM_INSERT.values(**params)).scalar_one()
                 db.session.commit()
-            except Exception:
+            except IntegrityError:
                 db.session.rollback()
+                if photo_path:
+                    discard_upload(photo_path)
+                # If the scanned/typed barcode already exists for this user, go to that item
+                if barcode_given:
+                    existing_id = db.session.execute(
+                        _ITEM_ID_BY_BARCODE, {"uid": current_user.id, "barcode": raw_barcode}
+                    ).scalar()
+                    if existing_id is not None:
+                        flash("Item with this barcode already exists; opening it.", "info")
+                        return redirect(url_for("item_detail", item_id=existing_id))
                 flash("Could not create item (possibly duplicate barcode).", "error")
                 return render_template("item_form.html", categories=categories, category=category, prefill=prefill)
+            except Exception:
+                db.session.rollback()
+                if photo_path:
+                    discard_upload(photo_path)
+                flash("Could not create item.", "error")
+                return render_template("item_form.html", categories=categories, category=category, prefill=prefill)
 
             flash("Item added.", "success")
-            return redirect(url_for("item_detail", item_id=item.id))
+            return redirect(url_for("item_detail", item_id=new_id))
 
         # GET → render the form (category can be None)
         return render_template("item_form.html", categories=categories, category=category, prefill=prefill)
 
-    # Health check
-    @app.route("/healthz")
-    def healthz():
-        return {"ok": True}
+    # Readiness: can we reach the database? (liveness is /healthz, no DB)
+    @app.route("/readyz")
+    def readyz():
+        try:
+            db.session.execute(text("SELECT 1"))
+        except Exception:
+            db.session.rollback()
+            return {"ok": False}, 503
+        return {"ok": True}, 200
+
+    # Health check: answered by _HealthzMiddleware before Flask dispatch
+    app.wsgi_app = _HealthzMiddleware(app.wsgi_app)
 
     return app
 
-
-# WSGI entrypoint
-app = create_app()
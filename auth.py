@@ -1,4 +1,6 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from functools import lru_cache
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_user, logout_user, login_required
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -6,6 +8,14 @@ from models import db, User
 
 auth_bp = Blueprint('auth', __name__)
 
+def _hash_password(password):
+    return generate_password_hash(password, method=current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt'))
+
+@lru_cache(maxsize=None)
+def _dummy_hash(method):
+    # Checked against when the email is unknown, so both paths pay the same KDF cost
+    return generate_password_hash('posh-inventory-dummy', method=method)
+
 @auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
@@ -17,7 +27,7 @@ def register():
         if User.query.filter_by(email=email).first():
             flash('Email already registered', 'error')
             return render_template('register.html')
-        user = User(email=email, password_hash=generate_password_hash(password))
+        user = User(email=email, password_hash=_hash_password(password))
         db.session.add(user)
         db.session.commit()
         flash('Account created. Please log in.', 'success')
@@ -30,6 +40,9 @@ def login():
         email = request.form['email'].strip().lower()
         password = request.form['password']
         user = User.query.filter_by(email=email).first()
+        if user is None:
+            # Constant-time-ish: don't reveal unknown emails via a faster response
+            check_password_hash(_dummy_hash(current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')), password)
         if not user or not check_password_hash(user.password_hash, password):
             flash('Invalid credentials', 'error')
             return render_template('login.html')
@@ -0,0 +1,5 @@
+# cache.py
+from flask_caching import Cache
+
+# Configured from Config (CACHE_TYPE etc.) in create_app()
+cache = Cache()
@@ -1,10 +1,24 @@
 # categories.py
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
+from sqlalchemy import exists, update
 from models import db, Category, Item
 
 categories_bp = Blueprint('categories', __name__)
 
+def user_categories(user_id):
+    """
+    (id, name) rows for a user's categories, sorted by name.
+    Not cached: it's one small query, and a per-worker cache would show
+    other workers' creates/deletes late.
+    """
+    return (
+        Category.query.with_entities(Category.id, Category.name)
+        .filter_by(user_id=user_id)
+        .order_by(Category.name.asc())
+        .all()
+    )
+
 @categories_bp.route('/categories', methods=['GET', 'POST'])
 @login_required
 def manage_categories():
@@ -13,8 +27,10 @@ def manage_categories():
         if not name:
             flash('Category name is required', 'error')
         else:
-            exists = Category.query.filter_by(user_id=current_user.id, name=name).first()
-            if exists:
+            dup = db.session.query(
+                exists().where(Category.user_id == current_user.id, Category.name == name)
+            ).scalar()
+            if dup:
                 flash('That category already exists.', 'error')
             else:
                 c = Category(user_id=current_user.id, name=name)
@@ -30,7 +46,13 @@ def manage_categories():
 @login_required
 def delete_category(cat_id):
     cat = Category.query.filter_by(id=cat_id, user_id=current_user.id).first_or_404()
-    Item.query.filter_by(user_id=current_user.id, category_id=cat.id).update({Item.category_id: None})
+    # One UPDATE; no need to sync session state since we redirect right after
+    db.session.execute(
+        update(Item)
+        .where(Item.user_id == current_user.id, Item.category_id == cat.id)
+        .values(category_id=None)
+        .execution_options(synchronize_session=False)
+    )
     db.session.delete(cat)
     db.session.commit()
     flash('Category deleted.', 'success')
@@ -43,9 +65,14 @@ def api_create_category():
     name = (request.form.get('name') or (request.json.get('name') if request.is_json else '')).strip()
     if not name:
         return {'ok': False, 'error': 'Name required'}, 400
-    exists = Category.query.filter_by(user_id=current_user.id, name=name).first()
-    if exists:
-        return {'ok': True, 'id': exists.id, 'name': exists.name, 'created': False}, 200
+    existing_id = (
+        db.session.query(Category.id)
+        .filter_by(user_id=current_user.id, name=name)
+        .limit(1)
+        .scalar()
+    )
+    if existing_id is not None:
+        return {'ok': True, 'id': existing_id, 'name': name, 'created': False}, 200
     cat = Category(user_id=current_user.id, name=name)
     db.session.add(cat)
     db.session.commit()
@@ -15,13 +15,26 @@ class Config:
         or "dev-secret"  # change in production
     )
 
+    # Password KDF for new hashes (werkzeug method string; existing hashes keep theirs)
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
     # Uploads
     # Folder name inside /static (configurable): e.g. "uploads"
     UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
     # Absolute folder on disk where files are saved
     UPLOAD_FOLDER = os.path.join(STATIC_DIR, UPLOAD_DIR)
     MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", "8000000"))  # 8MB
-    ALLOWED_EXTENSIONS = set(os.getenv("ALLOWED_EXTENSIONS", "jpg,jpeg,png,webp").split(","))
+    ALLOWED_EXTENSIONS = frozenset(
+        e.strip().lower().lstrip(".")
+        for e in os.getenv("ALLOWED_EXTENSIONS", "jpg,jpeg,png,webp").split(",")
+        if e.strip()
+    )
+
+    # Caching (Flask-Caching). Per-process SimpleCache by default;
+    # set CACHE_TYPE=RedisCache + CACHE_REDIS_URL to share between workers.
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "300"))
 
     # SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -35,5 +48,15 @@ class Config:
     SQLALCHEMY_ENGINE_OPTIONS = {
         "pool_pre_ping": True,
         "pool_recycle": 300,
+        # Compiled-SQL LRU (default 500); roomy enough that hot statements never get evicted
+        "query_cache_size": int(os.getenv("DB_QUERY_CACHE_SIZE", "1200")),
     }
+    # Server databases: size the pool per worker (≈ threads per worker).
+    # Keep Postgres max_connections >= workers * (pool_size + max_overflow).
+    if not SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
+        SQLALCHEMY_ENGINE_OPTIONS.update({
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        })
 
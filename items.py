@@ -1,64 +1,29 @@
 # items.py
-from datetime import datetime
-from decimal import Decimal, ROUND_CEILING
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+import re
+from decimal import Decimal
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
 from flask_login import login_required, current_user
+from sqlalchemy import delete, exists, select
+from sqlalchemy.exc import IntegrityError
 
 from models import db, Item, Category
-from utils import save_upload  # saving photos
+from categories import user_categories
+from posh import break_even_ceil
+from utils import save_upload, discard_upload, normalize_barcode, parse_money, parse_date  # photos, barcodes, form values
 
 items_bp = Blueprint("items", __name__)
 
-# ---------- Helpers ----------
-
-def _parse_money(v):
-    try:
-        return Decimal(v)
-    except Exception:
-        return None
+# Bulk delete: "1,2, 3" style id lists, capped and sent to the DB in IN() batches
+_ID_LIST_CHARS = re.compile(r"[\d,\s]*")
+_ID_TOKEN = re.compile(r"\d+")
+BULK_DELETE_MAX_IDS = 10_000
+BULK_DELETE_BATCH = 1000
 
-def _parse_date(v):
-    try:
-        return datetime.strptime(v, "%Y-%m-%d").date() if v else None
-    except Exception:
-        return None
+# ---------- Helpers ----------
 
 def _user_categories():
-    return (
-        Category.query.filter_by(user_id=current_user.id)
-        .order_by(Category.name.asc())
-        .all()
-    )
-
-def _round_up_cents(value: Decimal) -> Decimal:
-    """
-    Round UP to 2 decimals (ceil to the next cent).
-    """
-    if value is None:
-        return None
-    # convert dollars -> cents (as Decimal), ceil to integer, then back to dollars
-    cents = (value * Decimal("100")).to_integral_value(rounding=ROUND_CEILING)
-    return cents / Decimal("100")
-
-def _breakeven(purchase_price: Decimal | None) -> Decimal | None:
-    """
-    Poshmark fee: $2.95 if list < $15, else 20%.
-    Find the minimum list price L such that L - fee(L) - purchase >= 0.
-    Mirrors the JS used on the form.
-    """
-    if purchase_price is None or purchase_price <= 0:
-        return None
-
-    # Case 1: flat fee regime (list < $15)
-    flat_candidate = purchase_price + Decimal("2.95")
-    if flat_candidate < Decimal("15.00"):
-        return _round_up_cents(flat_candidate)
-
-    # Case 2: 20% regime (list >= $15) -> 0.8L = purchase => L = purchase / 0.8
-    percent_candidate = purchase_price / Decimal("0.8")
-    if percent_candidate < Decimal("15.00"):
-        percent_candidate = Decimal("15.00")
-    return _round_up_cents(percent_candidate)
+    # (id, name) rows for the dropdown; see categories.user_categories
+    return user_categories(current_user.id)
 
 # ---------- Routes ----------
 
@@ -92,44 +57,42 @@ def add_item():
         )
 
     # Optional category
-    category = None
+    category_id = None
     cat_id = f.get("category_id")
     if cat_id:
         try:
-            category = Category.query.filter_by(
-                id=int(cat_id), user_id=current_user.id
-            ).first()
+            # Ownership check only needs the PK back, not a hydrated Category
+            category_id = (
+                db.session.query(Category.id)
+                .filter_by(id=int(cat_id), user_id=current_user.id)
+                .scalar()
+            )
         except ValueError:
-            category = None
+            category_id = None
 
-    # Optional barcode, unique per user
-    barcode = (f.get("barcode") or "").strip()
-    if barcode:
-        existing = Item.query.filter_by(user_id=current_user.id, barcode=barcode).first()
-        if existing:
-            flash("An item with that barcode already exists.", "info")
-            return redirect(url_for("item_detail", item_id=existing.id))
+    # Optional barcode, unique per user (uq_user_barcode; duplicates handled at INSERT)
+    barcode = normalize_barcode(f.get("barcode"))
 
-    purchase_price = _parse_money(f.get("purchase_price")) or Decimal("0.00")
-    list_price = _parse_money(f.get("list_price"))
-    sold_price = _parse_money(f.get("sold_price"))
+    purchase_price = parse_money(f.get("purchase_price")) or Decimal("0.00")
+    list_price = parse_money(f.get("list_price"))
+    sold_price = parse_money(f.get("sold_price"))
 
     # If no list price was entered, auto-fill with breakeven (server-side safety)
     if list_price is None:
-        be = _breakeven(purchase_price)
+        be = break_even_ceil(purchase_price)
         if be is not None:
             list_price = be
 
     item = Item(
         user_id=current_user.id,
-        category_id=(category.id if category else None),
+        category_id=category_id,
         title=title,
         barcode=barcode or None,
         purchase_price=purchase_price,
         list_price=list_price,
         sold_price=sold_price,  # allow sold price at create
-        purchase_date=_parse_date(f.get("purchase_date")),
-        sold_date=_parse_date(f.get("sold_date")),
+        purchase_date=parse_date(f.get("purchase_date")),
+        sold_date=parse_date(f.get("sold_date")),
         purchase_source=f.get("purchase_source") or None,
         notes=f.get("notes") or None,
     )
@@ -142,8 +105,30 @@ def add_item():
         else:
             flash("Photo not saved (file type not allowed).", "error")
 
+    photo_path = item.photo_path
     db.session.add(item)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Only a conflict pays for the lookup; the happy path is a single INSERT
+        db.session.rollback()
+        if photo_path:
+            discard_upload(photo_path)
+        existing_id = None
+        if barcode:
+            existing_id = db.session.execute(
+                select(Item.id).where(Item.user_id == current_user.id, Item.barcode == barcode)
+            ).scalar()
+        if existing_id is not None:
+            flash("An item with that barcode already exists.", "info")
+            return redirect(url_for("item_detail", item_id=existing_id))
+        flash("Could not add item.", "error")
+        return render_template(
+            "add_edit_item.html",
+            item=None,
+            categories=_user_categories(),
+            prefill={"barcode": f.get("barcode","")}, read_only=False
+        )
     flash("Item added.", "success")
     return redirect(url_for("item_detail", item_id=item.id))
 
@@ -161,13 +146,13 @@ def edit_item(item_id):
         item.notes = form.get("notes") or None
 
         # Barcode (optional; unique per user when present)
-        new_barcode = (form.get("barcode") or "").strip() or None
+        new_barcode = normalize_barcode(form.get("barcode")) or None
         if new_barcode and new_barcode != (item.barcode or None):
-            dup = Item.query.filter(
+            dup = db.session.query(exists().where(
                 Item.user_id == current_user.id,
                 Item.barcode == new_barcode,
                 Item.id != item.id
-            ).first()
+            )).scalar()
             if dup:
                 flash("Another item already has that barcode.", "error")
                 return redirect(url_for("items.edit_item", item_id=item.id))
@@ -177,31 +162,35 @@ def edit_item(item_id):
         cat_id = form.get("category_id")
         if cat_id:
             try:
-                cat = Category.query.filter_by(id=int(cat_id), user_id=current_user.id).first()
-                if cat:
-                    item.category_id = cat.id
+                owned_id = (
+                    db.session.query(Category.id)
+                    .filter_by(id=int(cat_id), user_id=current_user.id)
+                    .scalar()
+                )
+                if owned_id is not None:
+                    item.category_id = owned_id
             except ValueError:
                 pass
 
         # Money / dates
-        pp = _parse_money(form.get("purchase_price"))
+        pp = parse_money(form.get("purchase_price"))
         if pp is not None:
             item.purchase_price = pp
 
-        lp = _parse_money(form.get("list_price"))
+        lp = parse_money(form.get("list_price"))
         if lp is None:
             # If user cleared it, set to server breakeven for safety
-            be = _breakeven(item.purchase_price or Decimal("0.00"))
+            be = break_even_ceil(item.purchase_price or Decimal("0.00"))
             item.list_price = be
         else:
             item.list_price = lp
 
         item.purchase_source = form.get("purchase_source") or None
-        item.purchase_date   = _parse_date(form.get("purchase_date"))
+        item.purchase_date   = parse_date(form.get("purchase_date"))
 
         # Optional sold fields
-        sold_price = _parse_money(form.get("sold_price"))
-        sold_date  = _parse_date(form.get("sold_date"))
+        sold_price = parse_money(form.get("sold_price"))
+        sold_date  = parse_date(form.get("sold_date"))
         if sold_price is not None:
             item.sold_price = sold_price
         if sold_date is not None:
@@ -231,12 +220,17 @@ def edit_item(item_id):
 @items_bp.post("/items/<int:item_id>/delete")
 @login_required
 def delete_item(item_id: int):
-    item = Item.query.filter_by(id=item_id, user_id=current_user.id).first_or_404()
-    db.session.delete(item)
+    # One round-trip: the WHERE does the ownership check, rowcount says if it matched
+    result = db.session.execute(
+        delete(Item).where(Item.id == item_id, Item.user_id == current_user.id)
+    )
     db.session.commit()
+    if result.rowcount == 0:
+        abort(404)
 
     # JSON/AJAX support
-    wants_json = request.accept_mimetypes.best == "application/json" or request.is_json
+    # Raw header substring test; no need to parse/sort the Accept list per request
+    wants_json = request.is_json or "application/json" in request.headers.get("Accept", "")
     if wants_json:
         return jsonify({"ok": True}), 200
 
@@ -251,29 +245,43 @@ def bulk_delete_items():
     if not ids_raw:
         return redirect(url_for("dashboard"))
 
-    try:
-        id_list = [int(x) for x in ids_raw.split(",") if x.strip()]
-    except Exception:
+    # One C-level pass pulls the numbers out; anything but digits/commas/space is bad input
+    if not _ID_LIST_CHARS.fullmatch(ids_raw):
         flash("Invalid selection.", "error")
         return redirect(url_for("dashboard"))
+    id_list = list(map(int, _ID_TOKEN.findall(ids_raw)))
 
     if not id_list:
         return redirect(url_for("dashboard"))
+    if len(id_list) > BULK_DELETE_MAX_IDS:
+        flash(f"Select at most {BULK_DELETE_MAX_IDS} items at a time.", "error")
+        return redirect(url_for("dashboard"))
 
-    # Only delete the current user's items
-    Item.query.filter(
-        Item.user_id == current_user.id,
-        Item.id.in_(id_list)
-    ).delete(synchronize_session=False)
+    # Only delete the current user's items; batch so IN() stays a sane size
+    deleted = 0
+    for start in range(0, len(id_list), BULK_DELETE_BATCH):
+        deleted += Item.query.filter(
+            Item.user_id == current_user.id,
+            Item.id.in_(id_list[start:start + BULK_DELETE_BATCH])
+        ).delete(synchronize_session=False)
     db.session.commit()
 
-    flash(f"Deleted {len(id_list)} item(s).", "success")
+    flash(f"Deleted {deleted} item(s).", "success")
     return redirect(url_for("dashboard"))
 
 
 @items_bp.route("/items/by_barcode/<barcode>")
 @login_required
 def by_barcode(barcode):
-    # Quick redirect helper by barcode
-    item = Item.query.filter_by(user_id=current_user.id, barcode=barcode).first_or_404()
-    return redirect(url_for("item_detail", item_id=item.id))
+    # Quick redirect helper by barcode; only the id is needed (uq_user_barcode index seek).
+    # Stored barcodes are normalized, so look up the normalized form first; rows
+    # saved before normalization may still hold the raw value (e.g. "X-1").
+    for code in dict.fromkeys((normalize_barcode(barcode), barcode)):
+        if not code:
+            continue
+        item_id = db.session.execute(
+            select(Item.id).where(Item.user_id == current_user.id, Item.barcode == code)
+        ).scalar_one_or_none()
+        if item_id is not None:
+            return redirect(url_for("item_detail", item_id=item_id))
+    abort(404)
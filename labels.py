@@ -1,78 +1,61 @@
 # labels.py
-from typing import List
-from flask import Blueprint, request, render_template, abort
+import re
+from collections import namedtuple
+from typing import Iterator
+from flask import Blueprint, request, stream_template, abort
 from flask_login import login_required, current_user
-from decimal import Decimal, ROUND_CEILING
+from decimal import Decimal
 
-from models import Item
+from sqlalchemy import case, select
+
+from models import db, Item
+from posh import break_even_ceil
 
 labels_bp = Blueprint("labels", __name__)
 
+# One printed label; fixed fields, so a namedtuple instead of a dict per row.
+# Templates read it the same way (lab.num / lab.price).
+LabelRow = namedtuple("LabelRow", "num price")
+
+# '40mm', ' 1.5in ', '30' (mm) -- one match instead of strip/lower/endswith/float tries
+_LEN_RE = re.compile(r'^\s*([+-]?\d+(?:\.\d+)?)\s*(mm|in|")?\s*$', re.I)
+
 # ---------------- helpers ----------------
 
 def _len_mm(s: str | None, default_mm: float) -> float:
     """
     Parse a CSS length like '40mm' or '30mm' -> float millimeters.
+    A bare number means mm; 'in' / '"' are converted from inches.
     Falls back to default_mm if missing/invalid.
     """
-    if not s:
+    m = _LEN_RE.match(s or "")
+    if not m:
         return default_mm
-    s = s.strip().lower()
-    if s.endswith("mm"):
-        try:
-            return float(s[:-2])
-        except Exception:
-            return default_mm
-    try:
-        # allow passing raw number meaning mm
-        return float(s)
-    except Exception:
-        return default_mm
-
+    v = float(m.group(1))
+    unit = m.group(2)
+    # anything matched that isn't mm is inches ('in' / '"')
+    return v * 25.4 if unit and unit.lower() != "mm" else v
 
-def _round_up_cents(value: Decimal) -> Decimal:
-    """Round UP to 2 decimals."""
-    cents = (value * Decimal("100")).to_integral_value(rounding=ROUND_CEILING)
-    return cents / Decimal("100")
 
-
-def _breakeven(purchase_price: Decimal | None) -> Decimal | None:
-    """
-    Poshmark fee:
-      - $2.95 if list < $15
-      - 20% if list >= $15
-    Find minimum list L so that L - fee(L) - purchase >= 0.
+def _labels_for_items_text(items) -> Iterator[LabelRow]:
     """
-    if purchase_price is None or purchase_price <= 0:
-        return None
-
-    flat = purchase_price + Decimal("2.95")
-    if flat < Decimal("15.00"):
-        return _round_up_cents(flat)
-
-    # 20% regime
-    percent = purchase_price / Decimal("0.8")
-    if percent < Decimal("15.00"):
-        percent = Decimal("15.00")
-    return _round_up_cents(percent)
-
-
-def _labels_for_items_text(items: List[Item]) -> List[dict]:
-    """
-    Build a list of dicts for text-only labels:
+    Yield one LabelRow per item for text-only labels from rows with
+    id / barcode / purchase_price (copies are repeated by the template):
       - num: the prominent number to print (barcode if present, else item id)
       - price: break-even price like '$12.34' (or '' if not computable)
     """
-    out: List[dict] = []
+    # Sheets repeat the same cost a lot; compute each price string once per request
+    prices: dict[Decimal | None, str] = {}
     for it in items:
         # Choose the number to show: prefer barcode, fallback to item id.
         num = (it.barcode or "").strip() or str(it.id)
 
-        be = _breakeven(it.purchase_price) if it.purchase_price is not None else None
-        price = f"${be:.2f}" if be is not None else ""
+        price = prices.get(it.purchase_price)
+        if price is None:
+            be = break_even_ceil(it.purchase_price) if it.purchase_price is not None else None
+            price = prices[it.purchase_price] = f"${be:.2f}" if be is not None else ""
 
-        out.append({"num": num, "price": price})
-    return out
+        yield LabelRow(num, price)
 
 # ---------------- route ----------------
 
@@ -122,12 +105,17 @@ def labels_print():
 
     # --- 2) Fetch items for this user ---
 
-    items = (
-        Item.query
-        .filter(Item.user_id == current_user.id, Item.id.in_(ids))
-        .order_by(Item.id.asc())
-        .all()
-    )
+    # Only the columns a label prints; plain rows, no ORM objects.
+    # Print in the order the ids were given (dashboard order), sorted by the DB.
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        abort(400, "Missing ids")
+    position = case({item_id: pos for pos, item_id in enumerate(ids)}, value=Item.id)
+    items = db.session.execute(
+        select(Item.id, Item.barcode, Item.purchase_price)
+        .where(Item.user_id == current_user.id, Item.id.in_(ids))
+        .order_by(position)
+    ).all()
     if not items:
         abort(404, "No items found")
 
@@ -147,14 +135,13 @@ def labels_print():
     margin = request.args.get("margin") or "0mm"
     gap = request.args.get("gap") or "0mm"
 
-    # --- 4) Build labels list, replicate by copies, and render ---
-
-    labels = _labels_for_items_text(items)
-    labels = [lab for lab in labels for _ in range(copies)]  # replicate copies
+    # --- 4) Stream the sheet; labels are generated as the template loops ---
 
-    return render_template(
+    # labels_print.html is standalone (no base.html / flashes), so it's safe to stream
+    return stream_template(
         "labels_print.html",
-        labels=labels,
+        labels=_labels_for_items_text(items),
+        copies=copies,
         cols=cols,
         label_w=f"{label_w_mm:.2f}mm",
         label_h=f"{label_h_mm:.2f}mm",
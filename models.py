@@ -61,13 +61,17 @@ class Item(db.Model):
         db.UniqueConstraint("user_id", "barcode", name="uq_user_barcode"),
         # Composite index to match your common lookup pattern
         Index("ix_items_user_barcode", "user_id", "barcode"),
+        # Dashboard listing: filter by user, newest first
+        Index("ix_items_user_created_at", "user_id", "created_at"),
+        # Dashboard category filter / category delete: items of one user in one category
+        Index("ix_items_user_category", "user_id", "category_id"),
     )
 
     def payout(self):
         if self.sold_price is None:
             return None
-        # sold_price is already Decimal from Numeric; Decimal(...) is still fine
-        return payout_after_fees(Decimal(self.sold_price))
+        # sold_price is already Decimal from Numeric; no need to copy it
+        return payout_after_fees(self.sold_price)
 
     def profit(self):
         if self.sold_price is None:
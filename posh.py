@@ -1,4 +1,5 @@
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal, ROUND_CEILING, ROUND_HALF_UP
+from functools import lru_cache
 
 # Poshmark (US) fees as of Oct 2024+: $2.95 under $15; 20% at $15+.
 FLAT_FEE = Decimal("2.95")
@@ -7,14 +8,43 @@ THRESHOLD = Decimal("15.00")
 
 TWO_PLACES = Decimal("0.01")
 
+def posh_fee_cents(sale_cents: int) -> int:
+    """Fee in cents for a sale in cents: 295 under $15, else 20% rounded half-up."""
+    return 295 if sale_cents < 1500 else (sale_cents * 20 + 50) // 100
+
+def payout_cents(sale_cents: int) -> int:
+    return sale_cents - posh_fee_cents(sale_cents)
+
+def _as_decimal(price) -> Decimal:
+    # Callers may pass int/float (e.g. a transient Item); accept them as before
+    return price if isinstance(price, Decimal) else Decimal(price)
+
+def _whole_cents(price: Decimal) -> int | None:
+    """price as int cents, or None if it has sub-cent digits."""
+    return int(price * 100) if price.as_tuple().exponent >= -2 else None
+
+# Prices cluster on a few values ($10, $15, $20...) and Decimal is hashable/immutable,
+# so the quantize-heavy helpers below are memoized.
+
+@lru_cache(maxsize=4096)
 def posh_fee(sale_price: Decimal) -> Decimal:
+    sale_price = _as_decimal(sale_price)
+    cents = _whole_cents(sale_price)
+    if cents is not None:
+        return Decimal(posh_fee_cents(cents)).scaleb(-2)
     if sale_price < THRESHOLD:
         return FLAT_FEE
     return (sale_price * PCT).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
 
+@lru_cache(maxsize=4096)
 def payout_after_fees(sale_price: Decimal) -> Decimal:
+    sale_price = _as_decimal(sale_price)
+    cents = _whole_cents(sale_price)
+    if cents is not None:
+        return Decimal(payout_cents(cents)).scaleb(-2)
     return (sale_price - posh_fee(sale_price)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
 
+@lru_cache(maxsize=4096)
 def break_even_listing_price(cost: Decimal) -> Decimal:
     """Minimum listing price such that payout_after_fees(price) == cost (0% profit).
     Handles the fee regime boundary at $15.
@@ -33,5 +63,34 @@ def break_even_listing_price(cost: Decimal) -> Decimal:
         pct_price = THRESHOLD
     return pct_price
 
+def break_even_ceil(cost: Decimal | None) -> Decimal | None:
+    """Minimum list price L with L - fee(L) - cost >= 0, rounded UP to the cent.
+    This is the price the item form / labels use (mirrors the form JS); None for
+    a missing or non-positive cost.
+    """
+    if cost is None or cost <= 0:
+        return None
+    if cost.as_tuple().exponent < -2:
+        return _break_even_ceil_exact(cost)
+
+    # Whole cents (Numeric(10, 2) / form input), so both regimes are exact int math
+    pc = int(cost * 100)
+    flat_c = pc + 295
+    if flat_c < 1500:
+        return Decimal(flat_c) / 100
+    # 20% regime: ceil(pc / 0.8) == (5*pc + 3) // 4, floored at $15.00
+    return Decimal(max((pc * 5 + 3) // 4, 1500)) / 100
+
+def _break_even_ceil_exact(cost: Decimal) -> Decimal:
+    """Decimal version of break_even_ceil for costs with more than 2 decimals."""
+    flat = cost + FLAT_FEE
+    if flat < THRESHOLD:
+        return _round_up_cents(flat)
+    return _round_up_cents(max(cost / (Decimal("1.00") - PCT), THRESHOLD))
+
+def _round_up_cents(value: Decimal) -> Decimal:
+    cents = (value * Decimal("100")).to_integral_value(rounding=ROUND_CEILING)
+    return cents / Decimal("100")
+
 def profit_after_fees(sale_price: Decimal, cost: Decimal) -> Decimal:
     return (payout_after_fees(Decimal(sale_price)) - Decimal(cost)).quantize(TWO_PLACES)
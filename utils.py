@@ -1,15 +1,77 @@
 # utils.py
 import os
+import re
 import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 from pathlib import Path
-from werkzeug.utils import secure_filename
 from flask import current_app
 
 # Pillow for safe image handling in Py 3.13+ (imghdr removed)
 from PIL import Image, ImageOps
 
 # Allowed extensions you'll accept from users
-ALLOWED_EXTS = {"jpg", "jpeg", "png", "webp", "gif", "bmp", "tiff"}
+ALLOWED_EXTS = frozenset({"jpg", "jpeg", "png", "webp", "gif", "bmp", "tiff"})
+
+# Longest edge kept for stored photos; phone shots are downscaled to this
+MAX_UPLOAD_EDGE = 1600
+
+_NON_ALNUM = re.compile(r"[^A-Za-z0-9]+")
+
+# Longest raw barcode worth caching; Item.barcode is String(64), so anything
+# longer is junk and shouldn't be able to pin memory in the cache.
+_MAX_CACHED_BARCODE_LEN = 64
+
+def normalize_barcode(raw: str | None) -> str:
+    """
+    Strip everything but ASCII letters/digits (scanner noise, dashes, spaces).
+    Cached because scanners resend the same codes over and over.
+    """
+    if not raw:
+        return ""
+    if len(raw) > _MAX_CACHED_BARCODE_LEN:
+        return _NON_ALNUM.sub("", raw)
+    return _normalize_barcode_cached(raw)
+
+@lru_cache(maxsize=1024)
+def _normalize_barcode_cached(raw: str) -> str:
+    return _NON_ALNUM.sub("", raw)
+
+# Form values repeat a lot (same prices/dates across a session); Decimal and
+# date are immutable, so the parsed results are safe to share. Only short
+# inputs are cached so oversized form posts can't pin memory in the cache.
+_MAX_CACHED_MONEY_LEN = 32
+
+@lru_cache(maxsize=1024)
+def _parse_money_cached(v: str) -> Decimal:
+    return Decimal(v)
+
+@lru_cache(maxsize=2048)
+def _parse_date_cached(v: str) -> date:
+    # <input type="date"> always submits YYYY-MM-DD; C ISO parser, no format string
+    return date.fromisoformat(v)
+
+def parse_money(v) -> Decimal | None:
+    # Blank fields are the common case; skip them without raising
+    v = v.strip() if isinstance(v, str) else ""
+    if not v:
+        return None
+    try:
+        if len(v) > _MAX_CACHED_MONEY_LEN:
+            return Decimal(v)
+        return _parse_money_cached(v)
+    except InvalidOperation:
+        return None
+
+def parse_date(v) -> date | None:
+    v = v.strip() if isinstance(v, str) else ""
+    if not v:
+        return None
+    try:
+        return _parse_date_cached(v)
+    except ValueError:
+        return None
 
 def _allowed_ext(filename: str) -> bool:
     if not filename or "." not in filename:
@@ -47,9 +109,16 @@ def save_upload(storage_file) -> str | None:
         # Open with PIL to validate content and normalize orientation
         # Image.open() will raise if the content is not a supported image
         with Image.open(storage_file.stream) as im:
+            # JPEG: let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of full size.
+            # Must happen before anything loads pixels (exif_transpose does).
+            im.draft("RGB", (MAX_UPLOAD_EDGE, MAX_UPLOAD_EDGE))
+
             # Auto-orient using EXIF
             im = ImageOps.exif_transpose(im)
 
+            # Cap the stored size; the draft decode leaves little left to resample
+            im.thumbnail((MAX_UPLOAD_EDGE, MAX_UPLOAD_EDGE), Image.Resampling.BICUBIC)
+
             # Convert to RGB for JPEG if needed (avoid saving CMYK/LA/P modes)
             if im.mode not in ("RGB", "L"):
                 im = im.convert("RGB")
@@ -61,3 +130,13 @@ def save_upload(storage_file) -> str | None:
 
     # Return path relative to /static so templates can: url_for("static", filename=out_rel)
     return out_rel
+
+def discard_upload(rel_path: str) -> None:
+    """
+    Remove a file written by save_upload() (e.g. when the row it belonged to
+    was never committed). Missing files are ignored.
+    """
+    try:
+        os.remove(os.path.join(current_app.static_folder, rel_path))
+    except OSError:
+        pass
@@ -0,0 +1,6 @@
+# wsgi.py
+# WSGI entrypoint (gunicorn wsgi:app). Kept out of app.py so importing the
+# factory (migrate.py, `flask --app app`, tests) doesn't build a second app.
+from app import create_app
+
+app = create_app()